@@ -161,20 +161,17 @@ class Config(commands.Cog):
     @commands.group(name="hide", invoke_without_command=True)
     async def hide(self, ctx, channel: discord.VoiceChannel):
         """hides given channel for the join/leave sound feature"""
-        hidden_channel = self.config.get('hidden', ctx.guild.id)
+        hidden_channel = self.config.get('hidden', ctx.guild.id, [])
         action = "hidden now..."
 
-        if hidden_channel is None:
-            self.config.store('hidden', [channel.id], ctx.guild.id)
-
-        elif channel.id in hidden_channel:
-            hidden_channel.remove(channel.id)
-            self.config.save()
+        if channel.id in hidden_channel:
+            hidden_channel = [c for c in hidden_channel if c != channel.id]
             action = "visible again..."
 
         else:
-            hidden_channel.append(channel.id)
-            self.config.save()
+            hidden_channel = hidden_channel + [channel.id]
+
+        self.config.store('hidden', hidden_channel, ctx.guild.id)
 
         msg = f"The channel `{channel.name}` is {action}"
         await ctx.send(embed=utils.embed(msg))
@@ -190,25 +187,23 @@ class Config(commands.Cog):
             return
 
         description = []
-        for channel_id in hidden_ids.copy():
+        existing_ids = []
+        for channel_id in hidden_ids:
             channel = self.bot.get_channel(channel_id)
-            if channel is None:
-                hidden_ids.remove(channel_id)
-
-            else:
+            if channel is not None:
+                existing_ids.append(channel_id)
                 description.append(f"**#{channel.name}**")
 
+        if len(existing_ids) != len(hidden_ids):
+            self.config.store('hidden', existing_ids, ctx.guild.id)
+
         embed = utils.embed("\n".join(description))
         await ctx.send(embed=embed)
 
     @hide.command(name="clear")
     async def clear_(self, ctx):
         """clears all hidden channels"""
-        hidden_ids = self.config.get('hidden', ctx.guild.id)
-
-        if hidden_ids:
-            hidden_ids.clear()
-            self.config.save()
+        self.config.remove('hidden', ctx.guild.id)
 
         msg = "All channels are visible again..."
         await ctx.send(embed=utils.embed(msg))
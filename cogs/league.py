@@ -1,12 +1,21 @@
 from discord.ext import commands, tasks
 from data.credentials import RITO_KEY
-from typing import Union
+from data import credentials
+from collections import OrderedDict
 import asyncio
 import discord
 import logging
 import random
+import typing
+import json
 import utils
-import os
+import time
+import io
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger('self')
 
@@ -30,7 +39,9 @@ class Summoner:
          self.tier,
          self.rank,
          self.lp,
-         self.last_match_id) = record
+         self.last_match_id,
+         self.revision_date) = record
+        self.record = tuple(record)
         self._attempts = 0
 
     def __eq__(self, other):
@@ -94,10 +105,10 @@ class Match:
     )
 
     def __init__(self, match, summoner_id):
+        # match is the projection, see Match.project
         self.data = match
         self.summoner_id = summoner_id
         self.inapplicable = False
-        self.player_data = None
 
         if self.data['gameType'] != "MATCHED_GAME":
             self.inapplicable = True
@@ -107,55 +118,78 @@ class Match:
             self.inapplicable = True
             return
 
-        participant_id = None
-        for data in self.data['participantIdentities']:
-            if data['player']['summonerId'] == summoner_id:
-                participant_id = data['participantId']
-                break
-
-        for data in self.data['participants']:
-            if data['participantId'] == participant_id:
-                self.player_data = data
-                self.player_stats = data['stats']
+        record = self.data['players'].get(summoner_id)
 
-        if self.player_data is None:
+        if record is None:
             self.inapplicable = True
             return
 
-        team_id = self.player_data['teamId']
-        for team in self.data['teams']:
-            if team['teamId'] == team_id:
-                self.team_data = team
+        (self.win,
+         self.champion_id,
+         self.kills,
+         self.deaths,
+         self.assists,
+         self.lane,
+         self.role,
+         self.share,
+         self.best_kd) = record
 
-        self.win = self.team_data['win'] == "Win"
         self.normal = self.data['gameMode'] == "CLASSIC"
-
-        self.kills = self.player_stats['kills']
-        self.deaths = self.player_stats['deaths']
-        self.assists = self.player_stats['assists']
         self.kd = self.kills / (self.deaths or 1)
         self.kda = (self.kills + self.assists) / (self.deaths or 1)
         self.str_kda = f"{self.kills}/{self.deaths}/{self.assists}"
-
-        self.lane = self.player_data['timeline']['lane']
-        self.role = self.player_data['timeline']['role']
         self.support = self.role == "DUO_SUPPORT"
 
-    def best_performance(self):
-        parts = self.kills + self.assists
-        team_kills = 0
-        kd_s = []
+    @staticmethod
+    def project(raw):
+        # runs in an executor, reduces the whole payload to one
+        # compact record per player with everything carry/int need
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+        summoner_ids = {}
+        for identity in data['participantIdentities']:
+            player = identity.get('player', {})
+            summoner_ids[identity['participantId']] = player.get('summonerId')
+
+        wins = {team['teamId']: team['win'] == "Win" for team in data['teams']}
+        team_kills = {}
+        best_kds = {}
+
+        for participant in data['participants']:
+            stats = participant['stats']
+            team_id = participant['teamId']
+            kd = stats['kills'] / (stats['deaths'] or 1)
+            team_kills[team_id] = team_kills.get(team_id, 0) + stats['kills']
+            best_kds[team_id] = max(best_kds.get(team_id, 0), kd)
+
+        players = {}
+        for participant in data['participants']:
+            summoner_id = summoner_ids.get(participant['participantId'])
+            if summoner_id is None:
+                continue
 
-        for data in self.data['participants']:
-            if data['teamId'] == self.team_data['teamId']:
-                kills = data['stats']['kills']
-                team_kills += kills
-                kd = kills / (data['stats']['deaths'] or 1)
-                kd_s.append(kd)
+            stats = participant['stats']
+            timeline = participant.get('timeline', {})
+            team_id = participant['teamId']
 
-        best_kd = sorted(kd_s, reverse=True)[0]
-        percentage = round(parts / (team_kills or 1) * 100)
-        return self.kd == best_kd and percentage >= 65
+            kills, deaths, assists = stats['kills'], stats['deaths'], stats['assists']
+            share = round((kills + assists) / (team_kills[team_id] or 1) * 100)
+            best_kd = kills / (deaths or 1) == best_kds[team_id]
+
+            players[summoner_id] = [wins.get(team_id, False), participant['championId'],
+                                    kills, deaths, assists, timeline.get('lane'),
+                                    timeline.get('role'), share, best_kd]
+
+        return {
+            'gameType': data['gameType'],
+            'gameMode': data['gameMode'],
+            'queueId': data['queueId'],
+            'gameCreation': data.get('gameCreation'),
+            'players': players
+        }
+
+    def best_performance(self):
+        return self.best_kd and self.share >= 65
 
     def carry(self):
         if not self.win:
@@ -184,29 +218,67 @@ class Match:
 
 class League(commands.Cog):
     base_url = "https://euw1.api.riotgames.com/lol"
-    # query = 'INSERT INTO summoner (user_id, id, account_id, puuid, ' \
-    #         'name, icon_id, level, wins, losses, tier, rank, lp, last_match_id) ' \
-    #         'VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13) ' \
-    #         'ON CONFLICT (user_id) DO UPDATE SET id=$2, account_id=$3, ' \
-    #         'puuid=$4, name=$5, icon_id=$6, level=$7, wins=$8, ' \
-    #         'losses=$9, tier=$10, rank=$11, lp=$12, last_match_id=$13'
+    pg_query = 'INSERT INTO summoner (user_id, id, account_id, puuid, ' \
+               'name, icon_id, level, wins, losses, tier, rank, lp, last_match_id, ' \
+               'revision_date) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, ' \
+               '$11, $12, $13, $14) ' \
+               'ON CONFLICT (user_id) DO UPDATE SET id=$2, account_id=$3, puuid=$4, ' \
+               'name=COALESCE($5, summoner.name), ' \
+               'icon_id=COALESCE($6, summoner.icon_id), ' \
+               'level=COALESCE($7, summoner.level), ' \
+               'wins=COALESCE($8, summoner.wins), ' \
+               'losses=COALESCE($9, summoner.losses), ' \
+               'tier=COALESCE($10, summoner.tier), ' \
+               'rank=COALESCE($11, summoner.rank), ' \
+               'lp=COALESCE($12, summoner.lp), ' \
+               'last_match_id=COALESCE($13, summoner.last_match_id), ' \
+               'revision_date=$14'
 
     # we have to use this monstrosity since sqlite3 on ubuntu doesnt support
     # on conflict update, don't ask me why
-    query = 'INSERT OR REPLACE INTO summoner (user_id, id, account_id, puuid, ' \
-            'name, icon_id, level, wins, losses, tier, rank, lp, last_match_id) ' \
-            'VALUES ($1, $2, $3, $4,' \
-            'COALESCE($5, (SELECT name FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($6, (SELECT icon_id FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($7, (SELECT level FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($8, (SELECT wins FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($9, (SELECT losses FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($10, (SELECT tier FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($11, (SELECT rank FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($12, (SELECT lp FROM summoner WHERE user_id = $1)),' \
-            'COALESCE($13, (SELECT last_match_id FROM summoner WHERE user_id = $1)))'
+    sqlite_query = 'INSERT OR REPLACE INTO summoner (user_id, id, account_id, puuid, ' \
+                   'name, icon_id, level, wins, losses, tier, rank, lp, last_match_id, ' \
+                   'revision_date) ' \
+                   'VALUES ($1, $2, $3, $4,' \
+                   'COALESCE($5, (SELECT name FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($6, (SELECT icon_id FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($7, (SELECT level FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($8, (SELECT wins FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($9, (SELECT losses FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($10, (SELECT tier FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($11, (SELECT rank FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($12, (SELECT lp FROM summoner WHERE user_id = $1)),' \
+                   'COALESCE($13, (SELECT last_match_id FROM summoner WHERE user_id = $1)), $14)'
+
+    match_queries = {
+        'sqlite': 'INSERT OR IGNORE INTO matches (id, data) VALUES ($1, $2)',
+        'postgres': 'INSERT INTO matches (id, data) VALUES ($1, $2) '
+                    'ON CONFLICT (id) DO NOTHING'
+    }
+
+    history_queries = {
+        'sqlite': 'INSERT OR IGNORE INTO match_history (match_id, summoner_id, '
+                  'game_creation, champion_id, win, kills, deaths, assists, carry, '
+                  'inted) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)',
+        'postgres': 'INSERT INTO match_history (match_id, summoner_id, '
+                    'game_creation, champion_id, win, kills, deaths, assists, carry, '
+                    'inted) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10) '
+                    'ON CONFLICT (match_id, summoner_id) DO NOTHING'
+    }
+
+    # aggregates over the last $2 recorded games of a summoner
+    stats_query = 'SELECT COUNT(*), SUM(win), SUM(kills), SUM(deaths), ' \
+                  'SUM(assists), SUM(carry), SUM(inted) FROM (SELECT * ' \
+                  'FROM match_history WHERE summoner_id = $1 ' \
+                  'ORDER BY game_creation DESC LIMIT $2) AS recent'
+
+    champion_query = 'SELECT champion_id, COUNT(*) AS amount FROM (SELECT champion_id ' \
+                     'FROM match_history WHERE summoner_id = $1 ORDER BY game_creation DESC ' \
+                     'LIMIT $2) AS recent GROUP BY champion_id ORDER BY amount DESC LIMIT 3'
 
     colour = 0x785A28
+    refresh_concurrency = getattr(credentials, 'LEAGUE_REFRESH_CONCURRENCY', 5)
+    match_cache_size = 512
     messages = {
         'up': [
             "Wie viel hat `{1}` gekostet,\n{0}?",
@@ -252,29 +324,114 @@ class League(commands.Cog):
         self.bot = bot
         self.champion = {}
         self.summoner = {}
+        self.channels = {}
+        self.guild_index = {}
+        self.matches = OrderedDict()
+        self._match_lookups = {}
+        self.badges = self.load_badges()
+        self.riot = utils.RiotClient(bot, RITO_KEY)
         self._reload_lock = asyncio.Event()
+        self.bot.config.subscribe('league', self.update_channel)
         self.refresh_champions.start()
         self.engine.start()
 
     def cog_unload(self):
+        self.bot.config.unsubscribe('league', self.update_channel)
         self.refresh_champions.cancel()
         self.engine.cancel()
 
+    def update_channel(self, guild_id, channel_id):
+        if channel_id is None:
+            self.channels.pop(guild_id, None)
+        else:
+            self.channels[guild_id] = channel_id
+
+    def index_guild(self, guild):
+        for member in guild.members:
+            self.guild_index.setdefault(member.id, set()).add(guild.id)
+
+    def unindex_member(self, user_id, guild_id):
+        guild_ids = self.guild_index.get(user_id)
+        if guild_ids is not None:
+            guild_ids.discard(guild_id)
+
+            if not guild_ids:
+                del self.guild_index[user_id]
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.guild_index.setdefault(member.id, set()).add(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.unindex_member(member.id, member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.index_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        for user_id in list(self.guild_index):
+            self.unindex_member(user_id, guild.id)
+
+    @property
+    def query(self):
+        if self.bot.db.dialect == "postgres":
+            return self.pg_query
+        else:
+            return self.sqlite_query
+
     async def load_summoner(self):
         await self.bot.wait_until_unlocked()
         query = 'SELECT * FROM summoner'
         cache = await self.bot.fetch(query)
         self.summoner = {rec[0]: Summoner(rec) for rec in cache}
+
+        self.guild_index.clear()
+        for guild in self.bot.guilds:
+            self.index_guild(guild)
+
         self._reload_lock.set()
 
     async def refresh_summoner(self):
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+
+        async def refresh(summoner):
+            async with semaphore:
+                priority = utils.RiotClient.BACKGROUND
+
+                try:
+                    data = await self.fetch_summoner_basic(summoner.account_id, id_=True, priority=priority)
+
+                    # riot bumps the revision date after every game, without
+                    # one there is no need to ask for league and matchlist
+                    if data['revisionDate'] == summoner.revision_date:
+                        return summoner
+
+                    return await self.fetch_summoner(data, priority=priority)
+
+                except utils.SummonerNotFound:
+                    return
+
+                # counts as unchanged, next tick tries again
+                except utils.NoRiotResponse:
+                    return summoner
+
+        current = list(self.summoner.items())
+        results = await asyncio.gather(*[refresh(s) for _, s in current])
+
         summoners = {}
         batch = []
+        unchanged = 0
 
-        for user_id, summoner in self.summoner.items():
-            try:
-                data = await self.fetch_summoner(summoner.account_id, id_=True)
-            except utils.SummonerNotFound:
+        for (user_id, summoner), data in zip(current, results):
+            if data is summoner:
+                summoners[user_id] = summoner
+                unchanged += 1
+
+            elif data is None:
                 resp = summoner.failed_attempt()
 
                 if resp is True:
@@ -286,10 +443,19 @@ class League(commands.Cog):
                 arguments = self.parse_arguments(user_id, data)
                 new_summoner_obj = Summoner(arguments)
                 summoners[user_id] = new_summoner_obj
-                batch.append(arguments)
 
-        await self.bot.db.executemany(self.query, batch)
-        await self.bot.db.commit()
+                if new_summoner_obj.record != summoner.record:
+                    batch.append(arguments)
+
+        if batch:
+            await self.bot.executemany(self.query, batch)
+
+        self.bot.metrics['summoner_unchanged'] += unchanged
+        self.bot.metrics['summoner_written'] += len(batch)
+
+        duration = time.perf_counter() - start
+        logger.info(f"league: refreshed {len(current)} summoners in {duration:.2f}s, "
+                    f"{unchanged} unchanged, {len(batch)} written")
         return summoners
 
     @tasks.loop(hours=24)
@@ -303,17 +469,29 @@ class League(commands.Cog):
             id_ = int(pkg['key'])
             self.champion[id_] = pkg
 
-    async def send_embed(self, channel, summoner, msg):
-        path = f"{self.bot.path}/data/league/{summoner.tier}.png"
+    def load_badges(self):
+        # tier images get read once, missing ones are reported here only
+        badges = {}
+        for tier in Summoner.all_tiers:
+            path = f"{self.bot.path}/data/league/{tier}.png"
 
-        if os.path.isfile(path):
-            file = discord.File(path, filename="tier.png")
-            embed = discord.Embed(description=f"\u200b\n{msg}", colour=self.colour)
-            embed.set_thumbnail(url="attachment://tier.png")
-            await utils.silencer(channel.send(file=file, embed=embed))
-            await asyncio.sleep(2)
-        else:
-            logger.error(f"{path} not found")
+            try:
+                with open(path, 'rb') as file:
+                    badges[tier] = file.read()
+            except FileNotFoundError:
+                logger.error(f"{path} not found")
+
+        return badges
+
+    def send_embed(self, channel, summoner, msg):
+        badge = self.badges.get(summoner.tier)
+        if badge is None:
+            return
+
+        file = discord.File(io.BytesIO(badge), filename="tier.png")
+        embed = discord.Embed(description=f"\u200b\n{msg}", colour=self.colour)
+        embed.set_thumbnail(url="attachment://tier.png")
+        self.bot.dispatcher.send(channel, file=file, embed=embed)
 
     @tasks.loop(minutes=10)
     async def engine(self):
@@ -329,41 +507,66 @@ class League(commands.Cog):
         if current_summoner is None:
             return
 
-        for guild in self.bot.guilds:
-            channel_id = self.bot.config.get('league', guild.id)
-            channel = guild.get_channel(channel_id)
+        changed = []
+        for user_id, summoner in current_summoner.items():
+            old_summoner = self.summoner.get(user_id)
+            if old_summoner is None:
+                continue
+
+            if old_summoner.int_rank != summoner.int_rank \
+                    or old_summoner.last_match_id != summoner.last_match_id:
+                changed.append((old_summoner, summoner))
+
+        # every new match gets fetched and recorded in the history,
+        # whether or not some guild is going to announce it
+        async def load_match(summoner):
+            try:
+                priority = utils.RiotClient.BACKGROUND
+                match_data = await self.get_match(summoner.last_match_id, priority)
+            except utils.NoRiotResponse:
+                return
+
+            if match_data is not None:
+                return Match(match_data, summoner.id)
+
+        new_games = [s for o, s in changed if s.last_match_id is not None
+                     and o.last_match_id != s.last_match_id]
+        results = await asyncio.gather(*[load_match(s) for s in new_games])
+        matches = {s.user_id: m for s, m in zip(new_games, results)}
+
+        # only guilds with a league channel which share a changed summoner
+        visits = {}
+        for old_summoner, summoner in changed:
+            for guild_id in self.guild_index.get(summoner.user_id, ()):
+                if guild_id in self.channels:
+                    visits.setdefault(guild_id, []).append((old_summoner, summoner))
+
+        for guild_id, pairs in visits.items():
+            channel = self.bot.get_channel(self.channels.get(guild_id))
 
             if channel is None:
                 continue
 
             messages = []
-            for member in guild.members:
-                old_summoner = self.summoner.get(member.id)
-                if old_summoner is None:
-                    continue
-
-                summoner = current_summoner.get(member.id)
-                if summoner is None:
+            for old_summoner, summoner in pairs:
+                member = channel.guild.get_member(summoner.user_id)
+                if member is None:
                     continue
 
                 name = f"[{member.display_name}]({summoner.op_gg})"
                 if old_summoner.int_rank < summoner.int_rank:
                     base = random.choice(self.messages['up'])
                     msg = base.format(name, summoner.str_rank)
-                    await self.send_embed(channel, summoner, msg)
+                    self.send_embed(channel, summoner, msg)
 
                 elif old_summoner.int_rank > summoner.int_rank:
                     base = random.choice(self.messages['down'])
                     msg = base.format(name, summoner.str_rank)
-                    await self.send_embed(channel, summoner, msg)
+                    self.send_embed(channel, summoner, msg)
 
-                if old_summoner.last_match_id != summoner.last_match_id:
-                    try:
-                        match_data = await self.fetch_match(summoner.last_match_id)
-                        match = Match(match_data, summoner.id)
-                    except utils.NoRiotResponse:
-                        continue
+                match = matches.get(summoner.user_id)
 
+                if match is not None:
                     if match.inapplicable:
                         continue
 
@@ -386,7 +589,7 @@ class League(commands.Cog):
             if messages:
                 description = "\n\n".join(messages)
                 embed = discord.Embed(description=description, colour=self.colour)
-                await utils.silencer(channel.send(embed=embed))
+                self.bot.dispatcher.send(channel, embed=embed, merge=True)
 
         self.summoner = current_summoner
         logger.debug("league engine done")
@@ -412,43 +615,28 @@ class League(commands.Cog):
         self.summoner[user_id] = new_summoner
         return new_summoner
 
-    async def fetch(self, url) -> Union[list, dict]:
-        headers = {'X-Riot-Token': RITO_KEY}
-        async with self.bot.session.get(url, headers=headers) as resp:
-            cache = await resp.json()
-
-            if isinstance(cache, list):
-                return cache
+    async def fetch(self, url, method, priority=utils.RiotClient.INTERACTIVE):
+        return await self.riot.get(url, method, priority)
 
-            status = cache.get('status')
-
-            if status is None:
-                return cache
-
-            status_code = status.get('status_code')
-            logger.debug(f"status code: {status_code}")
-            logger.debug(f"message: {status.get('message')}")
-
-            if status_code != 404:
-                raise utils.NoRiotResponse()
-
-    async def fetch_summoner_basic(self, argument, id_=False):
+    async def fetch_summoner_basic(self, argument, id_=False, priority=utils.RiotClient.INTERACTIVE):
         base = f"{self.base_url}/summoner/v4/summoners"
 
         if id_ is True:
             url = f"{base}/by-account/{argument}"
+            method = "summoner/by-account"
         else:
             url = f"{base}/by-name/{argument}"
+            method = "summoner/by-name"
 
-        result = await self.fetch(url)
+        result = await self.fetch(url, method, priority)
         if result is None:
             raise utils.SummonerNotFound(argument)
         else:
             return result
 
-    async def fetch_league(self, id_):
+    async def fetch_league(self, id_, priority=utils.RiotClient.INTERACTIVE):
         url = f"{self.base_url}/league/v4/entries/by-summoner/{id_}"
-        cache = await self.fetch(url)
+        cache = await self.fetch(url, "league/entries", priority)
 
         if cache is None:
             return
@@ -458,24 +646,87 @@ class League(commands.Cog):
             if q_type == "RANKED_SOLO_5x5":
                 return ranked
 
-    async def fetch_matches(self, account_id):
+    async def fetch_matches(self, account_id, priority=utils.RiotClient.INTERACTIVE):
         url = f"{self.base_url}/match/v4/matchlists/by-account/{account_id}"
-        cache = await self.fetch(url)
+        cache = await self.fetch(url, "match/matchlists", priority)
         if cache is not None:
             return cache.get('matches')
 
-    async def fetch_match(self, match_id):
+    async def fetch_match(self, match_id, priority=utils.RiotClient.INTERACTIVE):
         url = f"{self.base_url}/match/v4/matches/{match_id}"
-        return await self.fetch(url)
+        return await self.riot.get(url, "match/matches", priority, raw=True)
+
+    async def get_match(self, match_id, priority=utils.RiotClient.INTERACTIVE):
+        # memory first, then the matches table and riot only as last resort,
+        # a finished match never changes so every id gets fetched once
+        match = self.matches.get(match_id)
+
+        if match is not None:
+            self.matches.move_to_end(match_id)
+            self.bot.metrics['match_cache_hits'] += 1
+            return match
+
+        # concurrent lookups of the same match share one task
+        task = self._match_lookups.get(match_id)
+
+        if task is None:
+            task = self.bot.loop.create_task(self.lookup_match(match_id, priority))
+            self._match_lookups[match_id] = task
+            task.add_done_callback(lambda _: self._match_lookups.pop(match_id, None))
+
+        return await asyncio.shield(task)
+
+    async def lookup_match(self, match_id, priority):
+        row = await self.bot.fetchrow('SELECT data FROM matches WHERE id = $1', match_id)
+
+        if row is not None:
+            match = json.loads(row[0])
+            self.bot.metrics['match_db_hits'] += 1
+
+        else:
+            raw = await self.fetch_match(match_id, priority)
+            if raw is None:
+                return
 
-    async def fetch_summoner(self, argument, id_=False):
+            match = await self.bot.loop.run_in_executor(None, Match.project, raw)
+            self.bot.metrics['match_fetches'] += 1
+            query = self.match_queries[self.bot.db.dialect]
+            self.bot.db.enqueue(query, match_id, json.dumps(match))
+
+            rows = self.history_rows(match_id, match)
+            if rows:
+                query = self.history_queries[self.bot.db.dialect]
+                await self.bot.executemany(query, rows)
+
+        self.matches[match_id] = match
+        if len(self.matches) > self.match_cache_size:
+            self.matches.popitem(last=False)
+
+        return match
+
+    @staticmethod
+    def history_rows(match_id, match):
+        rows = []
+        for summoner_id in match['players']:
+            player = Match(match, summoner_id)
+            if player.inapplicable:
+                continue
+
+            rows.append((match_id, summoner_id, match['gameCreation'],
+                         player.champion_id, int(player.win), player.kills,
+                         player.deaths, player.assists, int(bool(player.carry())),
+                         int(bool(player.int()))))
+
+        return rows
+
+    async def fetch_summoner(self, argument, id_=False, priority=utils.RiotClient.INTERACTIVE):
         if not isinstance(argument, dict):
-            data = await self.fetch_summoner_basic(argument, id_=id_)
+            data = await self.fetch_summoner_basic(argument, id_=id_, priority=priority)
         else:
             data = argument
 
-        rank_data = await self.fetch_league(data['id'])
-        matches = await self.fetch_matches(data['accountId'])
+        rank_data, matches = await asyncio.gather(self.fetch_league(data['id'], priority),
+                                                  self.fetch_matches(data['accountId'], priority))
 
         if rank_data is not None:
             data.update(rank_data)
@@ -500,7 +751,8 @@ class League(commands.Cog):
             data.get('tier'),
             data.get('rank'),
             data.get('leaguePoints', 0),
-            data.get('last_match_id')
+            data.get('last_match_id'),
+            data.get('revisionDate')
         ]
 
     @commands.command(name="league")
@@ -545,6 +797,48 @@ class League(commands.Cog):
         embed.description = "\n".join(parts)
         await ctx.send(embed=embed)
 
+    @commands.command(name="stats")
+    async def stats_(self, ctx, games: typing.Optional[int] = 20, *, argument=None):
+        """shows stats over the last recorded games of your
+        or someones connected summoner, up to 100 games"""
+        summoner = self.get_summoner_by_member(ctx, argument)
+
+        if summoner is None:
+            await ctx.send("There's no member with the given name")
+            return
+
+        amount = min(max(games, 1), 100)
+        recent = max(amount // 2, 1)
+        row = await self.bot.fetchrow(self.stats_query, summoner.id, amount)
+        played, wins, kills, deaths, assists, carries, ints = row
+
+        if not played:
+            await ctx.send(f"There are no recorded games of `{summoner}` yet")
+            return
+
+        champions = []
+        for champion_id, count in await self.bot.fetch(self.champion_query, summoner.id, amount):
+            pkg = self.champion.get(champion_id)
+            name = pkg['name'] if pkg else champion_id
+            champions.append(f"{name} ({count})")
+
+        # the newer half of the games against all of them
+        row = await self.bot.fetchrow(self.stats_query, summoner.id, recent)
+        kda = (kills + assists) / (deaths or 1)
+        recent_kda = (row[2] + row[4]) / (row[3] or 1)
+        title = f"{summoner.name} (last {played} games)"
+        embed = discord.Embed(title=title, url=summoner.op_gg, colour=self.colour)
+        embed.set_thumbnail(url=summoner.icon_url)
+        parts = [
+            f"**Winrate:** {round(wins / played * 100)}% ({wins}/{played - wins})",
+            f"**KDA:** {kda:.2f} (last {min(recent, played)}: {recent_kda:.2f})",
+            f"**Carry/Int:** {carries}/{ints}",
+            f"**Champions:** {', '.join(champions)}"
+        ]
+
+        embed.description = "\n".join(parts)
+        await ctx.send(embed=embed)
+
     @commands.command(name="check")
     async def check_(self, ctx, *, username):
         """checks if given summoner name is already used or free,
@@ -118,9 +118,9 @@ class Netflix(commands.Cog):
 
         self._lock.clear()
 
-        await self.bot.db.execute('DELETE FROM movies')
-        await self.bot.db.executemany(query, args)
-        await self.bot.db.commit()
+        # both land in the same group commit
+        await self.bot.execute('DELETE FROM movies')
+        await self.bot.executemany(query, args)
         self.movies = movies
 
         self._lock.set()
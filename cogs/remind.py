@@ -1,9 +1,12 @@
 from discord.ext import commands
 from datetime import datetime
-import dateparser
+from data import credentials
 import asyncio
 import discord
 import logging
+import heapq
+import utils
+import time
 
 
 logger = logging.getLogger('self')
@@ -24,29 +27,16 @@ class Timer:
         self.channel_id = data[1]
         self.creation = datetime.fromtimestamp(data[2])
         self.expiration = datetime.fromtimestamp(data[3])
+        self.stamp = data[3]
         self.reason = data[4]
 
-    async def send(self):
-        embed = discord.Embed(colour=discord.Color.dark_gold())
-        embed.description = self.reason
-
-        channel = self.bot.get_channel(self.channel_id)
-        author = self.bot.get_user(self.author_id)
-
-        if author is None:
-            return
+    @property
+    def author(self):
+        return self.bot.get_user(self.author_id)
 
-        if channel is None:
-            channel = author
-
-        try:
-            msg = f"**Reminder:** {author.mention}"
-            await channel.send(msg, embed=embed)
-            logger.debug(f"reminder {self.id}: successfull")
-
-        except (discord.Forbidden, discord.HTTPException):
-            logger.debug(f"reminder {self.id}: not allowed")
-            return
+    @property
+    def delay(self):
+        return int(time.time() - self.stamp) // 60
 
 
 class Reminder(commands.Cog):
@@ -56,52 +46,229 @@ class Reminder(commands.Cog):
         self.char_limit = 200
         self.preset = "%d.%m.%Y | %H:%M:%S Uhr"
         self.set = {'PREFER_DATES_FROM': 'future'}
+        self.parser = utils.TimeParser(self.bot.metrics, settings=self.set)
+        self.batch_size = 500
+        self.fast_lane = 60
+        # reminders which are later than max_lateness seconds get dropped
+        self.max_lateness = getattr(credentials, 'REMINDER_MAX_LATENESS', 60 * 60 * 24)
+        # reminders for the same channel which are due within
+        # coalesce_window seconds get merged into one message
+        self.coalesce_window = 1
+        self.merge_limit = 10
+        self.page_size = 10
+        self.page_emojis = ("◀", "▶")
+        self.pending = {}
+        # every pending reminder by id and a min heap of
+        # (expiration, id), removed reminders stay in the heap
+        # until they surface or the heap gets compacted
+        self.reminders = {}
+        self.heap = []
+        # short reminders skip the heap and get a loop timer
+        self.fast_timers = {}
+        self._wakeup = asyncio.Event()
         self._task = self.bot.loop.create_task(self.remind_loop())
-        self._lock = asyncio.Event(loop=bot.loop)
-        self.current_reminder = None
 
     def cog_unload(self):
         self._task.cancel()
 
-    def restart(self, reminder=None):
-        self._task.cancel()
+        for handle in self.fast_timers.values():
+            handle.cancel()
 
-        if reminder is None:
-            self._lock.clear()
+    async def load_reminders(self):
+        data = await self.bot.fetch('SELECT * FROM reminder')
+        for row in data:
+            self.push(Timer(self.bot, row))
 
-        self.current_reminder = reminder
-        self._task = self.bot.loop.create_task(self.remind_loop())
+        logger.debug(f"reminder: loaded {len(self.reminders)}")
 
-    async def remind_loop(self):
-        await self.bot.wait_until_unlocked()
-        while not self.bot.is_closed():
+    async def catch_up(self):
+        # everything which expired while we were offline
+        # gets deleted and returned by a single statement
+        start = time.perf_counter()
+        query = 'DELETE FROM reminder WHERE expiration <= $1 RETURNING *'
+        rows = await self.bot.execute(query, round(time.time()), durable=True)
+        overdue = [Timer(self.bot, row) for row in rows]
+
+        async def deliver_overdue():
+            delivered, dropped = await self.deliver(overdue)
+            duration = time.perf_counter() - start
+            logger.info(f"reminder: caught up on {delivered} in {duration:.2f}s, "
+                        f"dropped {dropped}")
 
-            if not self.current_reminder:
-                query = 'SELECT * FROM reminder ORDER BY expiration'
-                data = await self.bot.fetchrow(query)
+        self.bot.loop.create_task(deliver_overdue())
 
-                if data is not None:
-                    self.current_reminder = Timer(self.bot, data)
+    async def deliver(self, timers):
+        now = time.time()
+        futures = set()
+        dropped = 0
 
-            if self.current_reminder:
-                logger.debug(f"reminder {self.current_reminder.id}: sleeping")
+        for timer in timers:
+            if now - timer.stamp > self.max_lateness:
+                dropped += 1
+            else:
+                futures.add(self.stage(timer))
 
-                difference = (self.current_reminder.expiration - datetime.now())
-                seconds = difference.total_seconds()
-                await asyncio.sleep(seconds)
+        if dropped:
+            logger.debug(f"reminder: dropped {dropped} late reminders")
 
-                query = "DELETE FROM reminder WHERE id = $1"
-                await self.bot.execute(query, self.current_reminder.id)
+        await asyncio.gather(*futures)
+        return len(timers) - dropped, dropped
 
-                if seconds > -60:
-                    logger.debug(f"reminder {self.current_reminder.id}: send message")
-                    await self.current_reminder.send()
+    def stage(self, timer):
+        # returns a future which is done once the channel batch got sent
+        batch = self.pending.get(timer.channel_id)
 
-                self.current_reminder = None
-                self._lock.clear()
+        if batch is None:
+            batch = ([], self.bot.loop.create_future())
+            self.pending[timer.channel_id] = batch
+            self.bot.loop.call_later(self.coalesce_window,
+                                     self.flush_channel, timer.channel_id)
+
+        batch[0].append(timer)
+        return batch[1]
+
+    def flush_channel(self, channel_id):
+        timers, future = self.pending.pop(channel_id)
+        self.bot.loop.create_task(self.send_channel(channel_id, timers, future))
+
+    async def send_channel(self, channel_id, timers, future):
+        try:
+            channel = self.bot.get_channel(channel_id)
+            sent = []
+
+            if channel is None:
+                # the channel is gone, everyone gets one dm instead
+                authors = {}
+                for timer in timers:
+                    authors.setdefault(timer.author_id, []).append(timer)
+
+                for author_id, batch in authors.items():
+                    user = self.bot.get_user(author_id)
+                    if user is not None:
+                        sent.append(self.send_reminders(user, batch))
 
             else:
-                await self._lock.wait()
+                for index in range(0, len(timers), self.merge_limit):
+                    batch = timers[index:index + self.merge_limit]
+                    sent.append(self.send_reminders(channel, batch))
+
+            await asyncio.gather(*[f for f in sent if f is not None])
+
+        finally:
+            future.set_result(None)
+
+    def send_reminders(self, destination, timers):
+        timers = [timer for timer in timers if timer.author is not None]
+        if not timers:
+            return
+
+        embed = discord.Embed(colour=discord.Color.dark_gold())
+        if len(timers) == 1:
+            embed.description = timers[0].reason
+        else:
+            for timer in timers:
+                name = f"{timer.author.display_name} (ID {timer.id})"
+                embed.add_field(name=name, value=timer.reason, inline=False)
+
+        delay = max(timer.delay for timer in timers)
+        if delay > 0:
+            embed.set_footer(text=f"Delayed by {delay} minutes")
+
+        mentions = []
+        for timer in timers:
+            if timer.author.mention not in mentions:
+                mentions.append(timer.author.mention)
+
+        ids = [timer.id for timer in timers]
+        logger.debug(f"reminder {ids}: queued")
+
+        msg = f"**Reminder:** {' '.join(mentions)}"
+        return self.bot.dispatcher.send(destination, msg, embed=embed)
+
+    def push(self, timer):
+        self.reminders[timer.id] = timer
+        entry = (timer.stamp, timer.id)
+        heapq.heappush(self.heap, entry)
+
+        if self.heap[0] is entry:
+            self._wakeup.set()
+
+    def schedule_fast(self, timer):
+        self.reminders[timer.id] = timer
+        delay = max(timer.stamp - time.time(), 0)
+        handle = self.bot.loop.call_later(delay, self.fire_fast, timer.id)
+        self.fast_timers[timer.id] = handle
+
+    def fire_fast(self, reminder_id):
+        self.fast_timers.pop(reminder_id, None)
+        timer = self.reminders.pop(reminder_id, None)
+
+        if timer is not None:
+            self.bot.loop.create_task(self.fire([timer]))
+
+    def discard(self, reminder_ids):
+        for reminder_id in reminder_ids:
+            self.reminders.pop(reminder_id, None)
+            handle = self.fast_timers.pop(reminder_id, None)
+
+            if handle is not None:
+                handle.cancel()
+
+        # fast timers never were in the heap and shouldn't get in there
+        if len(self.heap) > 2 * len(self.reminders) + 64:
+            self.heap = [(t.stamp, t.id) for t in self.reminders.values()
+                         if t.id not in self.fast_timers]
+            heapq.heapify(self.heap)
+
+    def pop_due(self, now):
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, reminder_id = heapq.heappop(self.heap)
+            timer = self.reminders.pop(reminder_id, None)
+
+            if timer is not None:
+                due.append(timer)
+
+        return due
+
+    async def remind_loop(self):
+        await self.bot.wait_until_unlocked()
+        await self.catch_up()
+        await self.load_reminders()
+
+        while not self.bot.is_closed():
+            while self.heap and self.heap[0][1] not in self.reminders:
+                heapq.heappop(self.heap)
+
+            self._wakeup.clear()
+
+            if not self.heap:
+                await self._wakeup.wait()
+                continue
+
+            seconds = self.heap[0][0] - time.time()
+            if seconds > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self.pop_due(time.time())
+            self.bot.loop.create_task(self.fire(due))
+
+    async def fire(self, due):
+        # the returned ids are the reminders we actually deleted,
+        # so nothing gets sent twice if another process was faster
+        deleted = set()
+        for index in range(0, len(due), self.batch_size):
+            ids = [timer.id for timer in due[index:index + self.batch_size]]
+            params = ", ".join(f"${n}" for n in range(1, len(ids) + 1))
+            query = f'DELETE FROM reminder WHERE id IN ({params}) RETURNING id'
+            rows = await self.bot.execute(query, *ids, durable=True)
+            deleted.update(row[0] for row in rows)
+
+        await self.deliver([t for t in due if t.id in deleted])
 
     @commands.command(name="now")
     async def now_(self, ctx):
@@ -120,8 +287,7 @@ class Reminder(commands.Cog):
         else:
             reason = "No Reason"
 
-        kwargs = {'locales': ["de-BE"], 'settings': self.set}
-        expected_date = dateparser.parse(time, **kwargs)
+        expected_date = self.parser.parse(time)
 
         if expected_date is None:
             msg = "No valid time format"
@@ -141,70 +307,99 @@ class Reminder(commands.Cog):
             await ctx.send(msg)
             return
 
-        current_stamp = current_date.timestamp()
-        expected_stamp = expected_date.timestamp()
+        current_stamp = round(current_date.timestamp())
+        expected_stamp = round(expected_date.timestamp())
         arguments = [ctx.author.id, ctx.channel.id, current_stamp, expected_stamp, reason]
         reminder = Timer(self.bot, arguments)
 
-        if difference < 60:
-            await ctx.send(embed=embed)
-            await asyncio.sleep(difference)
-            await reminder.send()
+        query = 'INSERT INTO reminder ' \
+                '(author_id, channel_id, creation, expiration, reason)' \
+                ' VALUES ($1, $2, $3, $4, $5) RETURNING id'
 
-        else:
-            query = 'INSERT INTO reminder ' \
-                    '(author_id, channel_id, creation, expiration, reason)' \
-                    ' VALUES ($1, $2, $3, $4, $5)'
-            cursor = await self.bot.db.execute(query, arguments)
-            reminder.id = cursor.lastrowid
-            await self.bot.db.commit()
-
-            if not self.current_reminder:
-                self.current_reminder = reminder
-                self._lock.set()
+        rows = await self.bot.execute(query, *arguments, durable=True)
+        reminder.id = rows[0][0]
 
-            else:
-                if reminder.expiration < self.current_reminder.expiration:
-                    self.restart(reminder)
+        # short reminders get a loop timer instead of the heap
+        if difference < self.fast_lane:
+            self.schedule_fast(reminder)
+        else:
+            self.push(reminder)
 
-            logger.debug(f"reminder {reminder.id}: registered")
-            embed.description = f"{embed.description[:-3]} (ID {reminder.id}):**"
-            await ctx.send(embed=embed)
+        logger.debug(f"reminder {reminder.id}: registered")
+        embed.description = f"{embed.description[:-3]} (ID {reminder.id}):**"
+        await ctx.send(embed=embed)
 
     @remind.command(name="list")
     async def list_(self, ctx):
         """shows all your active reminders"""
-        query = 'SELECT * FROM reminder WHERE author_id = $1 ORDER BY expiration'
-        data = await self.bot.fetch(query, ctx.author.id)
+        query = 'SELECT COUNT(*) FROM reminder WHERE author_id = $1'
+        row = await self.bot.fetchrow(query, ctx.author.id)
+        amount = row[0]
 
-        if not data:
+        if not amount:
             msg = "You don't have any active reminders"
             await ctx.send(msg)
+            return
 
-        else:
-            reminders = []
-            for row in data[:10]:
-                timer = Timer(self.bot, row)
-                date = timer.expiration.strftime(self.preset)
-                reminders.append(f"`ID {timer.id}` | **{date}**")
+        pages = (amount - 1) // self.page_size + 1
+        page = 0
 
-            title = f"Your active reminders ({len(data)} in total):"
-            embed = discord.Embed(description="\n".join(reminders), title=title)
-            await ctx.send(embed=embed)
+        embed = await self.reminder_page(ctx.author.id, page, pages, amount)
+        message = await ctx.send(embed=embed)
+
+        if pages == 1:
+            return
+
+        for emoji in self.page_emojis:
+            await message.add_reaction(emoji)
+
+        def check(r, u):
+            if u == ctx.author and r.message.id == message.id:
+                return str(r.emoji) in self.page_emojis
+
+        while True:
+            try:
+                reaction, user = await self.bot.wait_for('reaction_add', check=check, timeout=60)
+            except asyncio.TimeoutError:
+                await utils.silencer(message.clear_reactions())
+                return
+
+            await utils.silencer(message.remove_reaction(reaction.emoji, user))
+            step = -1 if str(reaction.emoji) == self.page_emojis[0] else 1
+            new_page = min(max(page + step, 0), pages - 1)
+
+            if new_page != page:
+                page = new_page
+                embed = await self.reminder_page(ctx.author.id, page, pages, amount)
+                await message.edit(embed=embed)
+
+    async def reminder_page(self, author_id, page, pages, amount):
+        query = 'SELECT id, expiration FROM reminder WHERE author_id = $1 ' \
+                'ORDER BY expiration, id LIMIT $2 OFFSET $3'
+        offset = page * self.page_size
+        data = await self.bot.fetch(query, author_id, self.page_size, offset)
+
+        reminders = []
+        for reminder_id, expiration in data:
+            date = datetime.fromtimestamp(expiration).strftime(self.preset)
+            reminders.append(f"`ID {reminder_id}` | **{date}**")
+
+        title = f"Your active reminders ({amount} in total):"
+        embed = discord.Embed(description="\n".join(reminders), title=title)
+        embed.set_footer(text=f"Page {page + 1}/{pages}")
+        return embed
 
     @remind.command(name="remove")
     async def remove_(self, ctx, reminder_id: int):
         """removes reminder with given id"""
-        query = 'DELETE FROM reminder WHERE author_id = $1 AND id = $2'
-        response = await self.bot.fetchrow(query, ctx.author.id, reminder_id)
-        await self.bot.db.commit()
+        query = 'DELETE FROM reminder WHERE author_id = $1 AND id = $2 RETURNING id'
+        deleted_rows = await self.bot.execute(query, ctx.author.id, reminder_id, durable=True)
 
-        if response == "DELETE 0":
+        if not deleted_rows:
             msg = "You don't have an active reminder with that ID"
             return await ctx.send(msg)
 
-        if self.current_reminder and self.current_reminder.id == reminder_id:
-            self.restart()
+        self.discard([reminder_id])
 
         await ctx.send("Your reminder has been deleted")
 
@@ -212,18 +407,14 @@ class Reminder(commands.Cog):
     async def clear_(self, ctx):
         """clears all active reminders"""
         query = 'DELETE FROM reminder WHERE author_id = $1 RETURNING id'
-        deleted_rows = await self.bot.fetch(query, ctx.author.id)
-        await self.bot.db.commit()
+        deleted_rows = await self.bot.execute(query, ctx.author.id, durable=True)
 
         if not deleted_rows:
             msg = "You don't have any active reminders"
             await ctx.send(msg)
             return
 
-        if self.current_reminder:
-            old_ids = [rec['id'] for rec in deleted_rows]
-            if self.current_reminder.id in old_ids:
-                self.restart()
+        self.discard([rec[0] for rec in deleted_rows])
 
         msg = f"All your active reminders have been deleted ({len(deleted_rows)})"
         await ctx.send(msg)
@@ -1,5 +1,6 @@
 from discord.ext import commands
 import logging
+import utils
 
 
 logger = logging.getLogger('self')
@@ -34,13 +35,39 @@ class Owner(commands.Cog):
     @commands.command(name="sql")
     async def sql_(self, ctx, *, query):
         try:
-            await self.bot.db.execute(query)
-            await self.bot.db.commit()
+            await self.bot.execute(query, durable=True)
             await ctx.send("Done")
 
         except Exception as error:
             await ctx.send(error)
 
+    @commands.command(name="metrics")
+    async def metrics_(self, ctx):
+        """shows the bots internal counters"""
+        metrics = dict(self.bot.metrics)
+        metrics['db_commits'] = self.bot.db.queue.commits
+        metrics['db_statements'] = self.bot.db.queue.statements
+
+        batch = [f"{key}: {value}" for key, value in sorted(metrics.items())]
+        content = "\n".join(batch)
+        await ctx.send(f"```\n{content}\n```")
+
+    @commands.command(name="explain")
+    async def explain_(self, ctx):
+        """shows the query plan of the hot queries"""
+        batch = []
+        for query in utils.hot_queries:
+            if isinstance(query, dict):
+                query = query[self.bot.db.dialect]
+
+            plan = await utils.explain(self.bot.db, query)
+            batch.append(f"# {query}")
+            batch.extend(plan)
+            batch.append("")
+
+        content = "\n".join(batch)
+        await ctx.send(f"```markdown\n{content[:1950]}\n```")
+
 
 def setup(bot):
     bot.add_cog(Owner(bot))
@@ -15,10 +15,21 @@ class Sounds(commands.Cog):
         self.bot = bot
         self.lock = []
         self.cache = {}
+        self.active = set()
         self.config = self.bot.config
+        self.config.subscribe('sound', self.update_active)
+
+    def cog_unload(self):
+        self.config.unsubscribe('sound', self.update_active)
+
+    def update_active(self, guild_id, value):
+        if value:
+            self.active.add(guild_id)
+        else:
+            self.active.discard(guild_id)
 
     def get_fullest_channel(self, guild):
-        ignored = self.config.get('hidden', guild.id, [])
+        ignored = self.config.snapshot(guild.id).hidden
 
         visible_channel = []
         for channel in guild.voice_channels:
@@ -57,8 +68,7 @@ class Sounds(commands.Cog):
         if guild in self.lock:
             return
 
-        active = self.config.get('sound', guild.id)
-        if not active:
+        if guild.id not in self.active:
             return
 
         most_people = self.get_fullest_channel(guild)
@@ -7,8 +7,28 @@ class Starboard(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.star_cache = DefaultDict(list)
+        self.boards = {}
+        self.limits = {}
+        self.bot.config.subscribe('starboard', self.update_board)
+        self.bot.config.subscribe('starcount', self.update_limit)
         self.bot.loop.create_task(self.star_setup())
 
+    def cog_unload(self):
+        self.bot.config.unsubscribe('starboard', self.update_board)
+        self.bot.config.unsubscribe('starcount', self.update_limit)
+
+    def update_board(self, guild_id, channel_id):
+        if channel_id is None:
+            self.boards.pop(guild_id, None)
+        else:
+            self.boards[guild_id] = channel_id
+
+    def update_limit(self, guild_id, amount):
+        if amount is None:
+            self.limits.pop(guild_id, None)
+        else:
+            self.limits[guild_id] = amount
+
     async def star_setup(self):
         await self.bot.wait_until_unlocked()
         query = 'SELECT guild_id, message_id FROM starboard ORDER BY guild_id'
@@ -50,7 +70,7 @@ class Starboard(commands.Cog):
                          icon_url=message.author.avatar_url_as(format='png'))
 
         embed.timestamp = message.created_at
-        await channel.send(embed=embed)
+        self.bot.dispatcher.send(channel, embed=embed)
 
         self.star_cache[message.guild.id].append(message.id)
         query = 'INSERT INTO starboard (guild_id, channel_id,' \
@@ -60,6 +80,10 @@ class Starboard(commands.Cog):
         
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        channel_id = self.boards.get(payload.guild_id)
+        if channel_id is None:
+            return
+
         guild = self.bot.get_guild(payload.guild_id)
         if guild is None:
             return
@@ -79,13 +103,12 @@ class Starboard(commands.Cog):
                 channel = self.bot.get_channel(payload.channel_id)
                 message = await channel.fetch_message(payload.message_id)
 
-            channel_id = self.bot.config.get('starboard', guild.id)
             channel = self.bot.get_channel(channel_id)
 
             if channel is None or channel == message.channel:
                 return
 
-            limit = self.bot.config.get('starcount', guild.id, default=5)
+            limit = self.limits.get(guild.id, 5)
 
             for reaction in message.reactions:
                 if reaction.emoji == "⭐" and reaction.count >= limit:
@@ -1,10 +1,13 @@
 from data.credentials import TOKEN, default_prefix
 from discord.ext import commands
-import aiosqlite
+from logging import handlers
+from data import credentials
+import collections
 import discord
 import aiohttp
 import asyncio
 import logging
+import queue
 import utils
 import os
 
@@ -31,9 +34,12 @@ class Aschenkuttel(commands.Bot):
         self.default_prefix = default_prefix
 
         self.config = utils.ConfigHandler(self)
+        self.metrics = collections.Counter()
+        self.dispatcher = utils.Dispatcher(self)
         self._lock = asyncio.Event()
         self.session = None
         self.db = None
+        self.log_listener = None
 
         self.activity = discord.Activity(type=2, name="Atilla Hildemann")
         self.add_check(self.global_check)
@@ -45,59 +51,51 @@ class Aschenkuttel(commands.Bot):
         if not self._lock.is_set():
             self.session = aiohttp.ClientSession(loop=self.loop)
 
-            db_path = f"{self.path}/data/database.db"
-            self.db = await aiosqlite.connect(db_path)
-            await self.setup_tables()
+            # either a postgres dsn or the path of a sqlite file
+            default_path = f"{self.path}/data/database.db"
+            db_url = getattr(credentials, 'DATABASE_URL', None) or default_path
+            self.db = utils.get_backend(db_url)
+            await self.db.connect()
+            await utils.migrate(self.db)
+            await self.config.load()
 
         self._lock.set()
         print("Once upon a time...")
 
-    async def setup_tables(self):
-        reminder = 'CREATE TABLE IF NOT EXISTS reminder' \
-                   '(id INTEGER PRIMARY KEY AUTOINCREMENT,' \
-                   'author_id BIGINT, channel_id BIGINT,' \
-                   'creation BIGINT, expiration BIGINT,' \
-                   'reason TEXT)'
-
-        starboard = 'CREATE TABLE IF NOT EXISTS starboard' \
-                    '(guild_id BIGINT, channel_id BIGINT,' \
-                    'message_id BIGINT, author_id BIGINT,' \
-                    'date TIMESTAMP, content TEXT, attachment TEXT)'
-
-        movies = 'CREATE TABLE IF NOT EXISTS movies' \
-                 '(id BIGINT PRIMARY KEY, title TEXT,' \
-                 'image_url TEXT, description TEXT, ' \
-                 'rating FLOAT, year SMALLINT, ' \
-                 'runtime INT, seconds INT)'
-
-        summoner = 'CREATE TABLE IF NOT EXISTS summoner' \
-                   '(user_id BIGINT PRIMARY KEY, id TEXT,' \
-                   'account_id TEXT, puuid TEXT, name TEXT,' \
-                   'icon_id INT, level SMALLINT, wins SMALLINT,' \
-                   'losses SMALLINT, tier TEXT, rank TEXT, ' \
-                   'lp SMALLINT, last_match_id BIGINT)'
-
-        query_pool = (reminder, starboard, movies, summoner)
-        for query in query_pool:
-            await self.execute(query)
-
     async def wait_until_unlocked(self):
         return await self._lock.wait()
 
     def is_set(self):
         return self._lock.is_set()
 
-    async def execute(self, query, *args):
-        await self.db.execute(query, args)
-        await self.db.commit()
+    async def close(self):
+        if self.is_closed():
+            return
+
+        await self.dispatcher.close()
+
+        if self.db is not None:
+            await self.db.close()
+
+        if self.session is not None:
+            await self.session.close()
+
+        await super().close()
+
+        if self.log_listener is not None:
+            self.log_listener.stop()
+
+    async def execute(self, query, *args, durable=False):
+        return await self.db.execute(query, *args, durable=durable)
+
+    async def executemany(self, query, args, durable=False):
+        return await self.db.executemany(query, args, durable=durable)
 
     async def fetch(self, query, *args):
-        cursor = await self.db.execute(query, args)
-        return await cursor.fetchall()
+        return await self.db.fetch(query, *args)
 
     async def fetchrow(self, query, *args):
-        cursor = await self.db.execute(query, args)
-        return await cursor.fetchone()
+        return await self.db.fetchrow(query, *args)
 
     @staticmethod
     async def global_check(ctx):
@@ -110,22 +108,59 @@ class Aschenkuttel(commands.Bot):
         else:
             return True
 
-    async def prefix(self, _, message):
+    def get_prefixes(self, message):
         if message.guild is None:
-            return self.default_prefix
+            return self.default_prefix,
+        else:
+            return self.config.snapshot(message.guild.id).prefixes
 
-        prefix = self.config.get('prefix', message.guild.id)
-        return prefix or self.default_prefix
+    async def prefix(self, _, message):
+        return self.get_prefixes(message)
+
+    async def process_commands(self, message):
+        if message.author.bot:
+            return
+
+        # most messages aren't commands, those get dropped
+        # here before a context is ever built for them
+        if not message.content.startswith(self.get_prefixes(message)):
+            self.metrics['messages_rejected'] += 1
+            return
+
+        self.metrics['messages_processed'] += 1
+        await super().process_commands(message)
 
     def setup_loggers(self):
+        # loggers only put records into the queue, the listener
+        # thread does the formatting and the actual disk writes
+        levels = getattr(credentials, 'LOG_LEVELS', {})
+        rotation = getattr(credentials, 'LOG_ROTATION', None)
+        log_queue = queue.SimpleQueue()
+        file_handlers = []
+
         for name in ('discord', 'self'):
-            logger = logging.getLogger(name)
-            logger.setLevel(logging.DEBUG)
-            handler = logging.FileHandler(filename=f'{self.path}/data/{name}.log',
-                                          encoding='utf-8', mode='w')
+            path = f'{self.path}/data/{name}.log'
+
+            if rotation is None:
+                handler = handlers.RotatingFileHandler(path, encoding='utf-8',
+                                                       maxBytes=5 * 1024 * 1024,
+                                                       backupCount=5)
+            else:
+                handler = handlers.TimedRotatingFileHandler(path, encoding='utf-8',
+                                                            when=rotation,
+                                                            backupCount=7)
+
             format_str = '%(asctime)s:%(levelname)s:%(name)s: %(message)s'
             handler.setFormatter(logging.Formatter(format_str))
-            logger.addHandler(handler)
+            handler.addFilter(logging.Filter(name))
+            file_handlers.append(handler)
+
+            logger = logging.getLogger(name)
+            logger.setLevel(levels.get(name, logging.DEBUG))
+            logger.addHandler(handlers.QueueHandler(log_queue))
+
+        self.log_listener = handlers.QueueListener(log_queue, *file_handlers)
+        self.log_listener.start()
 
     def setup_cogs(self):
         for file in default_cogs:
@@ -1,3 +1,8 @@
 from utils.classes import *
 from utils.toolbox import *
-from utils.error import *
\ No newline at end of file
+from utils.error import *
+from utils.database import *
+from utils.migrations import *
+from utils.timeparser import *
+from utils.riot import *
+from utils.dispatcher import *
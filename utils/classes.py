@@ -1,22 +1,119 @@
 from discord.ext import commands
 import utils
 import json
+import os
+
+
+class GuildConfig:
+    # read only view of the config values hot paths need already
+    # parsed, the config handler rebuilds it whenever one changes
+    __slots__ = ('guild_id', 'prefixes', 'hidden')
+    keys = ('prefix', 'hidden')
+
+    def __init__(self, guild_id, config, default_prefix):
+        self.guild_id = guild_id
+        self.prefixes = (config.get('prefix') or default_prefix,)
+        self.hidden = frozenset(config.get('hidden', ()))
 
 
 class ConfigHandler:
+    # every guild+key pair is one row in guild_config, reads are
+    # served from memory which gets loaded once on startup
+    queries = {
+        'sqlite': 'INSERT OR REPLACE INTO guild_config '
+                  '(guild_id, key, value) VALUES ($1, $2, $3)',
+        'postgres': 'INSERT INTO guild_config (guild_id, key, value) '
+                    'VALUES ($1, $2, $3) ON CONFLICT (guild_id, key) '
+                    'DO UPDATE SET value = $3'
+    }
+
     def __init__(self, bot):
         self.bot = bot
         self.path = f"{self.bot.path}/data/config.json"
-        self._config = self.config_setup()
+        self._config = {}
+        self._snapshots = {}
+        self._subscribers = {}
+
+        for key in GuildConfig.keys:
+            self.subscribe(key, self.refresh_snapshot)
+
+    async def load(self):
+        query = 'SELECT guild_id, key, value FROM guild_config'
+        rows = await self.bot.fetch(query)
+
+        if not rows and os.path.isfile(self.path):
+            rows = await self.import_legacy()
+
+        config = {}
+        for guild_id, key, value in rows:
+            config.setdefault(guild_id, {})[key] = json.loads(value)
+
+        self._config = config
+        self._snapshots.clear()
+
+        for key, callbacks in self._subscribers.items():
+            for callback in callbacks:
+                self.replay(key, callback)
+
+    async def import_legacy(self):
+        with open(self.path) as file:
+            data = json.load(file)
+
+        rows = []
+        for guild_id, config in data.items():
+            for key, value in config.items():
+                rows.append((int(guild_id), key, json.dumps(value)))
+
+        query = self.queries[self.bot.db.dialect]
+        await self.bot.executemany(query, rows, durable=True)
+        os.replace(self.path, f"{self.path}.imported")
+        return rows
+
+    def subscribe(self, key, callback):
+        # callback(guild_id, value) gets called for every current value
+        # of the key and on each change after, value is None on removal
+        self._subscribers.setdefault(key, []).append(callback)
+        self.replay(key, callback)
+
+    def unsubscribe(self, key, callback):
+        callbacks = self._subscribers.get(key, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def replay(self, key, callback):
+        for guild_id, config in self._config.items():
+            if key in config:
+                callback(guild_id, config[key])
+
+    def publish(self, key, guild_id):
+        value = self._config.get(guild_id, {}).get(key)
+        for callback in self._subscribers.get(key, []):
+            callback(guild_id, value)
+
+    def save(self, key, guild_id):
+        self.publish(key, guild_id)
+        config = self._config.get(guild_id, {})
+
+        if key in config:
+            query = self.queries[self.bot.db.dialect]
+            value = json.dumps(config[key])
+            self.bot.db.enqueue(query, guild_id, key, value)
+        else:
+            query = 'DELETE FROM guild_config WHERE guild_id = $1 AND key = $2'
+            self.bot.db.enqueue(query, guild_id, key)
+
+    def refresh_snapshot(self, guild_id, _):
+        self._snapshots.pop(guild_id, None)
+
+    def snapshot(self, guild_id):
+        snapshot = self._snapshots.get(guild_id)
 
-    def config_setup(self):
-        file = json.load(open(self.path))
-        data = {int(key): value for key, value in file.items()}
-        return data
+        if snapshot is None:
+            config = self._config.get(guild_id, {})
+            snapshot = GuildConfig(guild_id, config, self.bot.default_prefix)
+            self._snapshots[guild_id] = snapshot
 
-    def save(self):
-        with open(self.path, 'w') as file:
-            json.dump(self._config, file)
+        return snapshot
 
     def store(self, key, item, guild_id):
         config = self._config.get(guild_id)
@@ -26,7 +123,7 @@ class ConfigHandler:
         else:
             config[key] = item
 
-        self.save()
+        self.save(key, guild_id)
 
     def get(self, key, guild_id, default=None):
         config = self._config.get(guild_id, {})
@@ -35,10 +132,9 @@ class ConfigHandler:
 
     def remove(self, key, guild_id):
         config = self._config.get(guild_id)
-        if config:
-            job = config.pop(key, None)
-            if job:
-                self.save()
+        if config and key in config:
+            job = config.pop(key)
+            self.save(key, guild_id)
             return job
 
 
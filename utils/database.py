@@ -0,0 +1,371 @@
+import contextlib
+import aiosqlite
+import asyncio
+import logging
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+logger = logging.getLogger('self')
+
+
+class WriteQueue:
+    # collects write statements and commits them in groups,
+    # either once max_size statements are pending or after delay seconds
+    def __init__(self, backend, max_size=250, delay=0.5):
+        self.backend = backend
+        self.max_size = max_size
+        self.delay = delay
+        self.commits = 0
+        self.statements = 0
+        self._pending = []
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._closing = False
+        self._task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.worker())
+
+    def put(self, query, args=(), many=False, urgent=False):
+        future = asyncio.get_event_loop().create_future()
+        # errors are logged by the queue itself, callers
+        # who don't wait for durability won't retrieve them
+        future.add_done_callback(self.consume)
+        self._pending.append((query, args, many, future))
+        self._wakeup.set()
+
+        # someone waits for the commit, no reason to hold the group back
+        if urgent or len(self._pending) >= self.max_size:
+            self._full.set()
+
+        return future
+
+    @staticmethod
+    def consume(future):
+        if not future.cancelled():
+            future.exception()
+
+    async def worker(self):
+        while not self._closing:
+            await self._wakeup.wait()
+
+            try:
+                await asyncio.wait_for(self._full.wait(), self.delay)
+            except asyncio.TimeoutError:
+                pass
+
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            self._wakeup.clear()
+            self._full.clear()
+
+            if batch:
+                await self.commit(batch)
+
+    async def commit(self, batch):
+        statements = [(query, args, many) for query, args, many, _ in batch]
+
+        try:
+            results = await self.backend.commit_batch(statements)
+        except Exception as error:
+            logger.error(f"write queue: commit failed: {error}")
+            results = [(None, error)] * len(batch)
+
+        self.commits += 1
+        self.statements += len(batch)
+        logger.debug(f"write queue: committed {len(batch)} statements")
+
+        for (query, *_, future), (rows, error) in zip(batch, results):
+            if future.done():
+                continue
+            elif error is None:
+                future.set_result(rows)
+            else:
+                logger.error(f"write queue: {query} failed: {error}")
+                future.set_exception(error)
+
+    async def transaction(self, statements):
+        # all or nothing, runs after everything pending got committed
+        await self.flush()
+        async with self._lock:
+            await self.backend.commit_transaction(statements)
+            self.commits += 1
+            self.statements += len(statements)
+
+    async def close(self):
+        self._closing = True
+
+        if self._task is not None:
+            self._wakeup.set()
+            self._full.set()
+
+            # discord.py cancels every task on shutdown before close runs,
+            # whatever is still pending gets flushed below either way
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+            self._task = None
+
+        await self.flush()
+
+
+class Backend:
+    # shared interface behind bot.fetch/fetchrow/execute, writes
+    # always go through the write queue, reads go to the backend
+    dialect = None
+
+    def __init__(self):
+        self.queue = None
+
+    async def connect(self):
+        self.queue = WriteQueue(self)
+        self.queue.start()
+
+    def enqueue(self, query, *args):
+        # for callers outside of coroutines, the returned future
+        # resolves with the statement's rows once it's committed
+        return self.queue.put(query, args)
+
+    async def execute(self, query, *args, durable=False):
+        # statements get committed in groups by the write queue,
+        # pass durable if you need the result or the commit itself
+        future = self.queue.put(query, args, urgent=durable)
+        if durable:
+            return await future
+
+    async def executemany(self, query, args, durable=False):
+        future = self.queue.put(query, args, many=True, urgent=durable)
+        if durable:
+            return await future
+
+    async def transaction(self, statements):
+        # statements are (query, args) pairs which get committed
+        # together or not at all, errors are raised to the caller
+        await self.queue.transaction(statements)
+
+    async def fetch(self, query, *args):
+        raise NotImplementedError
+
+    async def fetchrow(self, query, *args):
+        raise NotImplementedError
+
+    async def commit_batch(self, statements):
+        # returns one (rows, error) pair per statement
+        raise NotImplementedError
+
+    async def commit_transaction(self, statements):
+        raise NotImplementedError
+
+    async def explain(self, query, *args):
+        raise NotImplementedError
+
+    async def close(self):
+        if self.queue is not None:
+            await self.queue.close()
+
+
+class SQLiteBackend(Backend):
+    # one writer connection fed by the write queue and a small pool
+    # of read only connections, WAL lets both work side by side
+    dialect = "sqlite"
+    pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,
+        'cache_size': -16000,
+        'busy_timeout': 5000
+    }
+
+    def __init__(self, path, readers=3):
+        super().__init__()
+        self.path = path
+        self.readers = readers
+        self.writer = None
+        self._pool = asyncio.Queue()
+        self._connections = []
+
+    async def open(self, read_only=False):
+        conn = await aiosqlite.connect(self.path)
+
+        for key, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {key} = {value}")
+
+        if read_only:
+            await conn.execute("PRAGMA query_only = 1")
+
+        self._connections.append(conn)
+        return conn
+
+    async def connect(self):
+        # journal mode has to be set before the readers attach
+        self.writer = await self.open()
+
+        for _ in range(self.readers):
+            conn = await self.open(read_only=True)
+            self._pool.put_nowait(conn)
+
+        await super().connect()
+        logger.debug(f"database: connected with {self.readers} readers")
+
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        conn = await self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put_nowait(conn)
+
+    async def fetch(self, query, *args):
+        async with self.reader() as conn:
+            async with conn.execute(query, args) as cursor:
+                return await cursor.fetchall()
+
+    async def fetchrow(self, query, *args):
+        async with self.reader() as conn:
+            async with conn.execute(query, args) as cursor:
+                return await cursor.fetchone()
+
+    async def commit_batch(self, statements):
+        results = []
+        for query, args, many in statements:
+            try:
+                if many:
+                    await self.writer.executemany(query, args)
+                    rows = []
+                else:
+                    async with self.writer.execute(query, args) as cursor:
+                        rows = await cursor.fetchall()
+
+            except Exception as error:
+                results.append((None, error))
+
+            else:
+                results.append((rows, None))
+
+        try:
+            await self.writer.commit()
+        except Exception:
+            await self.writer.rollback()
+            raise
+
+        return results
+
+    async def commit_transaction(self, statements):
+        # sqlite3 doesn't open transactions for ddl by itself
+        await self.writer.execute("BEGIN")
+
+        try:
+            for query, args in statements:
+                await self.writer.execute(query, args)
+        except Exception:
+            await self.writer.rollback()
+            raise
+
+        await self.writer.commit()
+
+    async def explain(self, query, *args):
+        rows = await self.fetch(f"EXPLAIN QUERY PLAN {query}", *args)
+        return [row[-1] for row in rows]
+
+    async def close(self):
+        await super().close()
+
+        for conn in self._connections:
+            await conn.close()
+
+        self._connections.clear()
+
+
+class PostgresBackend(Backend):
+    # pooled asyncpg connections, lets several bot processes share one
+    # database, every group commit runs in a single transaction
+    dialect = "postgres"
+
+    def __init__(self, dsn, min_size=2, max_size=10):
+        super().__init__()
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+
+    async def connect(self):
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is required for postgres databases")
+
+        self.pool = await asyncpg.create_pool(self.dsn,
+                                              min_size=self.min_size,
+                                              max_size=self.max_size)
+        await super().connect()
+        logger.debug("database: connected to postgres")
+
+    async def fetch(self, query, *args):
+        return await self.pool.fetch(query, *args)
+
+    async def fetchrow(self, query, *args):
+        return await self.pool.fetchrow(query, *args)
+
+    async def commit_batch(self, statements):
+        results = []
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                for query, args, many in statements:
+                    try:
+                        # savepoint, a failing statement
+                        # shouldn't take the whole group with it
+                        async with conn.transaction():
+                            if many:
+                                await conn.executemany(query, args)
+                                rows = []
+                            else:
+                                rows = await conn.fetch(query, *args)
+
+                    except Exception as error:
+                        results.append((None, error))
+
+                    else:
+                        results.append((rows, None))
+
+        return results
+
+    async def commit_transaction(self, statements):
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                for query, args in statements:
+                    await conn.execute(query, *args)
+
+    async def explain(self, query, *args):
+        async with self.pool.acquire() as conn:
+            statement = await conn.prepare(f"EXPLAIN {query}")
+            # asyncpg is strict about types, so the
+            # dummy arguments have to match the parameters
+            numeric = ('int2', 'int4', 'int8', 'float4', 'float8', 'numeric')
+            args = [0 if param.name in numeric else ''
+                    for param in statement.get_parameters()]
+            rows = await statement.fetch(*args)
+
+        return [row[0] for row in rows]
+
+    async def close(self):
+        await super().close()
+
+        if self.pool is not None:
+            await self.pool.close()
+
+
+def get_backend(url):
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresBackend(url)
+    else:
+        return SQLiteBackend(url)
@@ -0,0 +1,116 @@
+from collections import deque
+import discord
+import asyncio
+import logging
+
+logger = logging.getLogger('self')
+
+
+class Outbound:
+    __slots__ = ('destination', 'content', 'embed', 'file', 'merge', 'futures')
+
+    def __init__(self, destination, content, embed, file, merge, future):
+        self.destination = destination
+        self.content = content
+        self.embed = embed
+        self.file = file
+        self.merge = merge
+        self.futures = [future]
+
+    def compatible(self, other, limit):
+        # only plain description embeds of the same colour get merged
+        if not (self.merge and other.merge):
+            return False
+        elif self.file or other.file or self.content != other.content:
+            return False
+        elif self.embed is None or other.embed is None:
+            return False
+        elif self.embed.colour != other.embed.colour:
+            return False
+
+        length = len(self.embed.description) + len(other.embed.description) + 2
+        return length <= limit
+
+
+class Dispatcher:
+    # bot wide outbound queue, every destination gets its own worker which
+    # sends one message at a time, interval seconds apart. discord.py still
+    # waits for the route buckets itself, producers just enqueue and move on
+    def __init__(self, bot, interval=1, limit=2048):
+        self.bot = bot
+        self.interval = interval
+        self.limit = limit
+        self._queues = {}
+        self._workers = {}
+
+    def send(self, destination, content=None, *, embed=None, file=None, merge=False):
+        # the future resolves to the sent message or None if sending failed
+        future = self.bot.loop.create_future()
+        item = Outbound(destination, content, embed, file, merge, future)
+
+        queue = self._queues.get(destination.id)
+        if queue is None:
+            queue = self._queues[destination.id] = deque()
+
+        queue.append(item)
+
+        if destination.id not in self._workers:
+            coro = self.worker(destination.id, queue)
+            self._workers[destination.id] = self.bot.loop.create_task(coro)
+
+        return future
+
+    def merge(self, item, queue):
+        while queue and item.compatible(queue[0], self.limit):
+            other = queue.popleft()
+            description = f"{item.embed.description}\n\n{other.embed.description}"
+            item.embed = discord.Embed(description=description, colour=item.embed.colour)
+            item.futures.extend(other.futures)
+            self.bot.metrics['dispatch_merged'] += 1
+
+        return item
+
+    async def worker(self, key, queue):
+        try:
+            while queue:
+                item = self.merge(queue.popleft(), queue)
+                message = None
+
+                try:
+                    message = await item.destination.send(item.content, embed=item.embed, file=item.file)
+                    self.bot.metrics['dispatch_sent'] += 1
+                except (discord.Forbidden, discord.HTTPException) as error:
+                    logger.debug(f"dispatcher: {key} failed: {error}")
+                except Exception as error:
+                    # connection errors must not kill the worker
+                    logger.error(f"dispatcher: {key} failed: {error!r}")
+                finally:
+                    for future in item.futures:
+                        if not future.done():
+                            future.set_result(message)
+
+                if queue:
+                    await asyncio.sleep(self.interval)
+
+        finally:
+            self._workers.pop(key, None)
+            if not queue:
+                self._queues.pop(key, None)
+
+    async def close(self, timeout=10):
+        workers = list(self._workers.values())
+
+        if workers:
+            logger.debug(f"dispatcher: draining {len(workers)} queues")
+            _, pending = await asyncio.wait(workers, timeout=timeout)
+
+            for task in pending:
+                task.cancel()
+
+            await asyncio.gather(*pending, return_exceptions=True)
+
+            for queue in self._queues.values():
+                for item in queue:
+                    for future in item.futures:
+                        if not future.done():
+                            future.set_result(None)
@@ -0,0 +1,177 @@
+import logging
+import re
+
+logger = logging.getLogger('self')
+
+# every entry is one schema version, never edit an applied
+# migration, append a new one instead. statements which differ
+# between the backends are dicts keyed by their dialect
+migrations = [
+    (
+        {
+            'sqlite': 'CREATE TABLE IF NOT EXISTS reminder'
+                      '(id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                      'author_id BIGINT, channel_id BIGINT,'
+                      'creation BIGINT, expiration BIGINT,'
+                      'reason TEXT)',
+            'postgres': 'CREATE TABLE IF NOT EXISTS reminder'
+                        '(id SERIAL PRIMARY KEY,'
+                        'author_id BIGINT, channel_id BIGINT,'
+                        'creation BIGINT, expiration BIGINT,'
+                        'reason TEXT)'
+        },
+
+        'CREATE TABLE IF NOT EXISTS starboard'
+        '(guild_id BIGINT, channel_id BIGINT,'
+        'message_id BIGINT, author_id BIGINT,'
+        'date TIMESTAMP, content TEXT, attachment TEXT)',
+
+        {
+            'sqlite': 'CREATE TABLE IF NOT EXISTS movies'
+                      '(id BIGINT PRIMARY KEY, title TEXT,'
+                      'image_url TEXT, description TEXT, '
+                      'rating FLOAT, year SMALLINT, '
+                      'runtime INT, seconds INT)',
+            # runtime is stored as given by the api, e.g. 1h30m
+            'postgres': 'CREATE TABLE IF NOT EXISTS movies'
+                        '(id BIGINT PRIMARY KEY, title TEXT,'
+                        'image_url TEXT, description TEXT, '
+                        'rating FLOAT, year SMALLINT, '
+                        'runtime TEXT, seconds INT)'
+        },
+
+        'CREATE TABLE IF NOT EXISTS summoner'
+        '(user_id BIGINT PRIMARY KEY, id TEXT,'
+        'account_id TEXT, puuid TEXT, name TEXT,'
+        'icon_id INT, level SMALLINT, wins SMALLINT,'
+        'losses SMALLINT, tier TEXT, rank TEXT, '
+        'lp SMALLINT, last_match_id BIGINT)'
+    ),
+    (
+        'CREATE INDEX IF NOT EXISTS reminder_expiration '
+        'ON reminder (expiration)',
+
+        'CREATE INDEX IF NOT EXISTS reminder_author '
+        'ON reminder (author_id, expiration)',
+
+        # older versions could star the same message twice
+        {
+            'sqlite': 'DELETE FROM starboard WHERE rowid NOT IN '
+                      '(SELECT MIN(rowid) FROM starboard '
+                      'GROUP BY guild_id, message_id)',
+            'postgres': 'DELETE FROM starboard a USING starboard b '
+                        'WHERE a.ctid > b.ctid AND a.guild_id = b.guild_id '
+                        'AND a.message_id = b.message_id'
+        },
+
+        'CREATE UNIQUE INDEX IF NOT EXISTS starboard_message '
+        'ON starboard (guild_id, message_id)'
+    ),
+    (
+        'CREATE TABLE IF NOT EXISTS guild_config'
+        '(guild_id BIGINT, key TEXT, value TEXT,'
+        'PRIMARY KEY (guild_id, key))',
+    ),
+    (
+        # Match.project output as json, one compact record per player
+        'CREATE TABLE IF NOT EXISTS matches'
+        '(id BIGINT PRIMARY KEY, data TEXT)',
+    ),
+    (
+        'ALTER TABLE summoner ADD COLUMN revision_date BIGINT',
+    ),
+    (
+        'CREATE TABLE IF NOT EXISTS match_history'
+        '(match_id BIGINT, summoner_id TEXT,'
+        'game_creation BIGINT, champion_id INT,'
+        'win SMALLINT, kills SMALLINT, deaths SMALLINT,'
+        'assists SMALLINT, carry SMALLINT, inted SMALLINT,'
+        'PRIMARY KEY (match_id, summoner_id))',
+
+        'CREATE INDEX IF NOT EXISTS match_history_summoner '
+        'ON match_history (summoner_id, game_creation)'
+    )
+]
+
+# queries which run per event or per loop iteration, like
+# the migrations dialect specific ones are dicts
+hot_queries = [
+    'SELECT COUNT(*) FROM reminder WHERE author_id = $1',
+    'SELECT id, expiration FROM reminder WHERE author_id = $1 '
+    'ORDER BY expiration, id LIMIT $2 OFFSET $3',
+    # the reminder loop builds one placeholder per due reminder
+    'DELETE FROM reminder WHERE id IN ($1, $2, $3) RETURNING id',
+    'DELETE FROM reminder WHERE author_id = $1 AND id = $2 RETURNING id',
+    # runs for every changed summoner on each league tick
+    {
+        'sqlite': 'INSERT OR REPLACE INTO summoner (user_id, id, account_id, puuid, '
+                  'name, icon_id, level, wins, losses, tier, rank, lp, last_match_id, '
+                  'revision_date) '
+                  'VALUES ($1, $2, $3, $4,'
+                  'COALESCE($5, (SELECT name FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($6, (SELECT icon_id FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($7, (SELECT level FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($8, (SELECT wins FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($9, (SELECT losses FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($10, (SELECT tier FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($11, (SELECT rank FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($12, (SELECT lp FROM summoner WHERE user_id = $1)),'
+                  'COALESCE($13, (SELECT last_match_id FROM summoner WHERE user_id = $1)), $14)',
+        'postgres': 'INSERT INTO summoner (user_id, id, account_id, puuid, '
+                    'name, icon_id, level, wins, losses, tier, rank, lp, last_match_id, '
+                    'revision_date) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, '
+                    '$11, $12, $13, $14) '
+                    'ON CONFLICT (user_id) DO UPDATE SET id=$2, account_id=$3, puuid=$4, '
+                    'name=COALESCE($5, summoner.name), '
+                    'icon_id=COALESCE($6, summoner.icon_id), '
+                    'level=COALESCE($7, summoner.level), '
+                    'wins=COALESCE($8, summoner.wins), '
+                    'losses=COALESCE($9, summoner.losses), '
+                    'tier=COALESCE($10, summoner.tier), '
+                    'rank=COALESCE($11, summoner.rank), '
+                    'lp=COALESCE($12, summoner.lp), '
+                    'last_match_id=COALESCE($13, summoner.last_match_id), '
+                    'revision_date=$14'
+    },
+    'SELECT data FROM matches WHERE id = $1',
+    'SELECT COUNT(*), SUM(win), SUM(kills), SUM(deaths), SUM(assists), '
+    'SUM(carry), SUM(inted) FROM (SELECT * FROM match_history WHERE '
+    'summoner_id = $1 ORDER BY game_creation DESC LIMIT $2) AS recent',
+    'SELECT champion_id, COUNT(*) AS amount FROM (SELECT champion_id '
+    'FROM match_history WHERE summoner_id = $1 ORDER BY game_creation DESC '
+    'LIMIT $2) AS recent GROUP BY champion_id ORDER BY amount DESC LIMIT 3'
+]
+
+
+async def migrate(db):
+    query = 'CREATE TABLE IF NOT EXISTS schema_version (version INT)'
+    await db.execute(query, durable=True)
+
+    row = await db.fetchrow('SELECT MAX(version) FROM schema_version')
+    current = row[0] or 0
+
+    for version, statements in enumerate(migrations, start=1):
+        if version <= current:
+            continue
+
+        # the version gets recorded in the same transaction,
+        # a crash in between can't apply a migration twice
+        batch = []
+        for query in statements:
+            if isinstance(query, dict):
+                query = query[db.dialect]
+
+            batch.append((query, ()))
+
+        query = 'INSERT INTO schema_version (version) VALUES ($1)'
+        batch.append((query, (version,)))
+        await db.transaction(batch)
+        logger.debug(f"database: migrated to version {version}")
+
+    return len(migrations)
+
+
+async def explain(db, query):
+    # dummy arguments are enough for the planner
+    amount = max(map(int, re.findall(r'\$(\d+)', query)), default=0)
+    return await db.explain(query, *[0] * amount)
@@ -0,0 +1,196 @@
+from utils.error import NoRiotResponse
+from collections import deque
+import itertools
+import asyncio
+import logging
+import heapq
+import time
+
+logger = logging.getLogger('self')
+
+
+class RateLimit:
+    # sliding window of amount requests per window seconds
+    def __init__(self, amount, window):
+        self.amount = amount
+        self.window = window
+        self.stamps = deque()
+
+    def delay(self, now):
+        while self.stamps and self.stamps[0] <= now - self.window:
+            self.stamps.popleft()
+
+        if len(self.stamps) < self.amount:
+            return 0
+        else:
+            return self.stamps[0] + self.window - now
+
+    def add(self, now, amount=1):
+        self.stamps.extend([now] * amount)
+
+
+class RateLimiter:
+    # every limit riot announces via its headers, e.g. 20:1,100:120
+    def __init__(self):
+        self.spec = None
+        self.limits = []
+        self.blocked_until = 0
+
+    def delay(self, now):
+        delays = [limit.delay(now) for limit in self.limits]
+        return max([self.blocked_until - now, *delays])
+
+    def add(self, now):
+        for limit in self.limits:
+            limit.add(now)
+
+    def update(self, spec, counts, now):
+        if spec is None:
+            return
+
+        if spec != self.spec:
+            self.spec = spec
+            self.limits = []
+            for part in spec.split(","):
+                amount, window = part.split(":")
+                self.limits.append(RateLimit(int(amount), int(window)))
+
+        # riot knows better than us if other processes share the key
+        if counts is not None:
+            windows = {limit.window: limit for limit in self.limits}
+            for part in counts.split(","):
+                count, window = map(int, part.split(":"))
+                limit = windows.get(window)
+
+                if limit is not None and count > len(limit.stamps):
+                    limit.add(now, count - len(limit.stamps))
+
+
+class RiotClient:
+    # rate limit aware client for the riot api, requests wait for a free
+    # slot in priority order, identical requests in flight get shared
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    def __init__(self, bot, key, retries=3):
+        self.bot = bot
+        self.key = key
+        self.retries = retries
+        self.app = RateLimiter()
+        self.methods = {}
+        self._waiters = []
+        self._counter = itertools.count()
+        self._inflight = {}
+        self._handle = None
+
+    def limiter(self, method):
+        limiter = self.methods.get(method)
+        if limiter is None:
+            limiter = self.methods[method] = RateLimiter()
+
+        return limiter
+
+    async def acquire(self, method, priority):
+        future = self.bot.loop.create_future()
+        entry = (priority, next(self._counter), method, future)
+        heapq.heappush(self._waiters, entry)
+        self.release()
+        await future
+
+    def release(self):
+        # hands out slots in priority order, waiters whose method is
+        # limited get skipped so they don't hold up other methods
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+        now = time.monotonic()
+        skipped = []
+        wakeup = None
+
+        while self._waiters:
+            entry = heapq.heappop(self._waiters)
+            _, _, method, future = entry
+
+            if future.done():
+                continue
+
+            delay = self.app.delay(now)
+            if delay > 0:
+                skipped.append(entry)
+                wakeup = delay
+                break
+
+            limiter = self.limiter(method)
+            delay = limiter.delay(now)
+            if delay > 0:
+                skipped.append(entry)
+                wakeup = delay if wakeup is None else min(wakeup, delay)
+                continue
+
+            self.app.add(now)
+            limiter.add(now)
+            future.set_result(None)
+
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+        if wakeup is not None:
+            self._handle = self.bot.loop.call_later(wakeup, self.release)
+
+    async def get(self, url, method, priority=INTERACTIVE, raw=False):
+        key = (url, raw)
+        task = self._inflight.get(key)
+
+        if task is None:
+            coro = self.request(url, method, priority, raw)
+            task = self.bot.loop.create_task(coro)
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def request(self, url, method, priority, raw):
+        headers = {'X-Riot-Token': self.key}
+
+        for attempt in range(self.retries + 1):
+            await self.acquire(method, priority)
+
+            async with self.bot.session.get(url, headers=headers) as resp:
+                now = time.monotonic()
+                limiter = self.limiter(method)
+                self.app.update(resp.headers.get('X-App-Rate-Limit'),
+                                resp.headers.get('X-App-Rate-Limit-Count'), now)
+                limiter.update(resp.headers.get('X-Method-Rate-Limit'),
+                               resp.headers.get('X-Method-Rate-Limit-Count'), now)
+
+                if resp.status == 200:
+                    if raw:
+                        return await resp.read()
+                    else:
+                        return await resp.json()
+
+                elif resp.status == 404:
+                    return
+
+                elif resp.status == 429:
+                    retry_after = int(resp.headers.get('Retry-After', 2 ** attempt))
+                    limit_type = resp.headers.get('X-Rate-Limit-Type')
+
+                    if limit_type == "application":
+                        self.app.blocked_until = now + retry_after
+                    elif limit_type == "method":
+                        limiter.blocked_until = now + retry_after
+                    else:
+                        await asyncio.sleep(retry_after)
+
+                elif resp.status >= 500:
+                    await asyncio.sleep(2 ** attempt)
+
+                else:
+                    logger.debug(f"riot: {url} returned {resp.status}")
+                    raise NoRiotResponse()
+
+            logger.debug(f"riot: {url} returned {resp.status}, attempt {attempt + 1}")
+
+        raise NoRiotResponse()
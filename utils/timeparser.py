@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import datetime
+import re
+
+
+class TimeParser:
+    # handles the common inputs like 10m, 2h30m, morgen 18:00 or in 3 tagen
+    # itself and only falls back to dateparser for everything else.
+    # the cache stores parsed specs, not dates, since most of them are relative
+    units = {
+        's': 1, 'sek': 1, 'sec': 1, 'sekunde': 1, 'sekunden': 1,
+        'm': 60, 'min': 60, 'minute': 60, 'minuten': 60,
+        'h': 3600, 'std': 3600, 'stunde': 3600, 'stunden': 3600,
+        'd': 86400, 't': 86400, 'tag': 86400, 'tage': 86400, 'tagen': 86400,
+        'w': 604800, 'woche': 604800, 'wochen': 604800
+    }
+    day_offsets = {'heute': 0, 'morgen': 1, 'übermorgen': 2}
+
+    clock = r'(?:um\s+)?(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<uhr>uhr)?'
+    duration_pattern = re.compile(r'(?:in\s+)?(?:\d+\s*[a-z]+\s*)+')
+    unit_pattern = re.compile(r'(\d+)\s*([a-z]+)')
+    clock_pattern = re.compile(rf'(?:(?P<day>heute|übermorgen|morgen)\s*)?(?:{clock})?')
+    date_pattern = re.compile(rf'(?P<d>\d{{1,2}})\.(?P<m>\d{{1,2}})\.(?P<y>\d{{4}})?(?:\s+{clock})?')
+
+    def __init__(self, metrics=None, size=1024, settings=None):
+        self.metrics = metrics if metrics is not None else {}
+        self.size = size
+        self.settings = settings or {'PREFER_DATES_FROM': 'future'}
+        self._cache = OrderedDict()
+
+    def count(self, key):
+        self.metrics[key] = self.metrics.get(key, 0) + 1
+
+    def parse(self, text, now=None):
+        now = now or datetime.datetime.now()
+        normalized = " ".join(text.lower().split())
+
+        try:
+            spec = self._cache[normalized]
+            self._cache.move_to_end(normalized)
+            self.count('timeparse_cache_hits')
+
+        except KeyError:
+            spec = self.compile(normalized)
+            self._cache[normalized] = spec
+            self.count('timeparse_cache_misses')
+
+            if len(self._cache) > self.size:
+                self._cache.popitem(last=False)
+
+        if spec is not None:
+            result = self.resolve(spec, now)
+            if result is not None:
+                self.count('timeparse_fast')
+                return result
+
+        self.count('timeparse_fallback')
+        return self.fallback(text)
+
+    @classmethod
+    def compile(cls, text):
+        if cls.duration_pattern.fullmatch(text):
+            parts = cls.unit_pattern.findall(text)
+
+            # 9 uhr looks like a duration as well
+            if all(unit in cls.units for _, unit in parts):
+                seconds = sum(int(amount) * cls.units[unit] for amount, unit in parts)
+                return 'delta', seconds
+
+        match = cls.date_pattern.fullmatch(text)
+        if match is not None:
+            year = match['y'] and int(match['y'])
+            hour, minute = match['hour'], match['minute']
+            return ('date', int(match['d']), int(match['m']), year,
+                    hour and int(hour), minute and int(minute))
+
+        match = cls.clock_pattern.fullmatch(text)
+        if match is not None and text:
+            hour, minute = match['hour'], match['minute']
+
+            # a lonely number is too ambiguous for us
+            if hour and not (minute or match['uhr'] or match['day']):
+                return
+
+            return ('clock', cls.day_offsets.get(match['day']),
+                    hour and int(hour), minute and int(minute))
+
+    @staticmethod
+    def resolve(spec, now):
+        kind, *args = spec
+
+        try:
+            if kind == 'delta':
+                return now + datetime.timedelta(seconds=args[0])
+
+            elif kind == 'clock':
+                days, hour, minute = args
+
+                if hour is None:
+                    result = now
+                else:
+                    result = now.replace(hour=hour, minute=minute or 0,
+                                         second=0, microsecond=0)
+
+                if days is not None:
+                    return result + datetime.timedelta(days=days)
+                elif result <= now:
+                    return result + datetime.timedelta(days=1)
+                else:
+                    return result
+
+            else:
+                day, month, year, hour, minute = args
+                time = now.time() if hour is None else datetime.time(hour, minute or 0)
+                result = datetime.datetime.combine(datetime.date(year or now.year, month, day), time)
+
+                if year is None and result <= now:
+                    result = result.replace(year=now.year + 1)
+
+                return result
+
+        except (ValueError, OverflowError):
+            return
+
+    def fallback(self, text):
+        # dateparser takes its time to import, only load it once needed
+        import dateparser
+        return dateparser.parse(text, locales=["de-BE"], settings=self.settings)